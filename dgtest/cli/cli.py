@@ -108,6 +108,14 @@ shared_options = [
         help="The specific branch to diff against",
         type=str,
     ),
+    click.option(
+        "-e",
+        "--exclude-dir",
+        "exclude_dirs",
+        help="Skip directories with the given name when walking the codebase (hidden directories, __pycache__, venv, and node_modules are always skipped)",
+        type=str,
+        multiple=True,
+    ),
     click.option(
         "-c",
         "--config",
@@ -152,9 +160,18 @@ def list_command(
     ignore_paths: Tuple[str],
     filter_: Optional[str],
     branch: Optional[str],
+    exclude_dirs: Tuple[str],
 ) -> None:
     """ See 'list_dgtest_results' for more detail """
-    list_dgtest_results(source, tests, depth, list(ignore_paths), filter_, branch)
+    list_dgtest_results(
+        source,
+        tests,
+        depth,
+        list(ignore_paths),
+        filter_,
+        branch,
+        list(exclude_dirs),
+    )
 
 
 @cli.command(
@@ -175,11 +192,19 @@ def run_command(
     ignore_paths: Tuple[str],
     filter_: Optional[str],
     branch: Optional[str],
+    exclude_dirs: Tuple[str],
     pytest_opts: Tuple[str],
 ) -> None:
     """ See 'run_dgtest_results' for more detail """
     code = run_dgtest_results(
-        source, tests, depth, list(ignore_paths), filter_, branch, list(pytest_opts)
+        source,
+        tests,
+        depth,
+        list(ignore_paths),
+        filter_,
+        branch,
+        list(exclude_dirs),
+        list(pytest_opts),
     )
     sys.exit(code)
 
@@ -3,6 +3,7 @@ from typing import List, Optional
 import click
 import pytest
 
+from dgtest.core.cache import ParseCache
 from dgtest.core.fs import get_changed_files
 from dgtest.core.graph import determine_tests_to_run
 from dgtest.core.parse import get_dependency_graphs
@@ -15,6 +16,7 @@ def list_dgtest_results(
     ignore_paths: List[str],
     filter_: Optional[str],
     branch: Optional[str],
+    exclude_dirs: List[str],
 ) -> List[str]:
     """Command responsible for listing out the test files determined by the dgtest algorithm
 
@@ -25,14 +27,18 @@ def list_dgtest_results(
         ignore_paths: Any test files that starts with any paths in this collection are ignored in the output
         filter_: Only test paths that start with this value are included in the output
         branch: The git branch to diff against
+        exclude_dirs: Names of directories to skip when walking the codebase (in addition to the defaults)
 
     Returns:
         A list of test results from your test suite
 
     """
     changed_source_files, changed_test_files = get_changed_files(branch)
+
+    # Shared across parsing stages so each file is only parsed once
+    cache = ParseCache()
     source_dependency_graph, tests_dependency_graph = get_dependency_graphs(
-        source, tests
+        source, tests, exclude_dirs, cache
     )
 
     # Test dependency graph will be empty if no tests are present
@@ -55,8 +61,8 @@ def list_dgtest_results(
     if not files_to_test:
         click.echo("  No tests to run!")
     else:
-        for file in files_to_test:
-            click.echo(f"  {file}")
+        # Emit results in a single write rather than one per file
+        click.echo("\n".join(f"  {file}" for file in files_to_test))
 
     return files_to_test
 
@@ -68,6 +74,7 @@ def run_dgtest_results(
     ignore_paths: List[str],
     filter_: Optional[str],
     branch: Optional[str],
+    exclude_dirs: List[str],
     pytest_opts: List[str],
 ) -> int:
     """Command responsible for running the test files determined by the dgtest algorithm
@@ -79,6 +86,7 @@ def run_dgtest_results(
         ignore_paths: Any test files that starts with any paths in this collection are ignored in the output
         filter_: Only test paths that start with this value are included in the output
         branch: The git branch to diff against
+        exclude_dirs: Names of directories to skip when walking the codebase (in addition to the defaults)
         pytest_opts: Any pytest flags, options, or args -- note that they may not collide with a dgtest option
 
     Returns:
@@ -86,7 +94,7 @@ def run_dgtest_results(
 
     """
     files_to_test = list_dgtest_results(
-        source, tests, depth, ignore_paths, filter_, branch
+        source, tests, depth, ignore_paths, filter_, branch, exclude_dirs
     )
     if len(files_to_test) == 0:
         return 0
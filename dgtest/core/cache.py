@@ -0,0 +1,16 @@
+from typing import TYPE_CHECKING, Dict, List
+
+if TYPE_CHECKING:
+    from dgtest.core.parse import Import
+
+
+class ParseCache:
+    """Per-run store of what one parsing stage extracts for use by a later stage
+
+    Source files are visited by both the definition and import stages. Rather than parsing each file
+    twice (or holding onto entire ASTs, which are many times larger than the source), the definition
+    stage records each file's import statements for the import stage to pick up.
+    """
+
+    def __init__(self) -> None:
+        self.imports: Dict[str, List["Import"]] = {}
@@ -1,12 +1,37 @@
-import glob
-import pathlib
-from typing import List, Optional, Tuple
-
-import git
+import itertools
+import os
+import re
+from typing import FrozenSet, Iterable, Iterator, List, Optional, Set, Tuple
+
+import click
+import pygit2
+
+# Directories that never contain relevant source/test files
+# Hidden directories (.git, .venv, .tox, etc.) are always skipped so they needn't be listed here
+DEFAULT_EXCLUDED_DIRS = frozenset({"__pycache__", "node_modules", "venv"})
+
+# Test files are either pytest modules (test_*.py) or conftests
+_PY_SUFFIX = ".py"
+_TEST_PREFIX = "test_"
+_CONFTEST = "conftest.py"
+
+# Used to classify NUL-delimited paths in bulk (test files are test_*.py or conftest.py)
+# NUL is the only character that can't appear in a path so every path is matched in its entirety;
+# `(?<![^\0])` and `(?![^\0])` anchor matches to the start and end of each path
+_TEST_FILE_RE = re.compile(
+    r"(?<![^\0])(?:[^\0]*/)?(?:test_[^/\0]*|conftest)\.py(?![^\0])"
+)
+_SOURCE_FILE_RE = re.compile(
+    r"(?<![^\0])(?!(?:[^\0]*/)?(?:test_[^/\0]*|conftest)\.py(?![^\0]))[^\0]*\.py(?![^\0])"
+)
 
 
 def get_changed_files(branch: Optional[str]) -> Tuple[List[str], List[str]]:
-    """Perform `git diff HEAD <branch> --name-only` to retrieve a list of files that have changed in the last commit
+    """Diff the working tree against HEAD (or <branch>) to retrieve a list of files that have changed
+
+    Diffs are computed in-process through libgit2 (via pygit2) rather than by shelling out to `git diff`.
+    When a branch is provided, a single diff is taken from the merge base of HEAD and <branch> to the
+    working tree; this covers both the commits made on the current branch and any local modifications.
 
     Args:
         branch: The git branch to diff against
@@ -16,38 +41,104 @@ def get_changed_files(branch: Optional[str]) -> Tuple[List[str], List[str]]:
         These files must end in .py and should still existing in the current codebase.
 
     """
-    repo = git.Repo()
-
-    # Collected any modified files (both staged and unstaged)
-    local_diff = repo.git.diff("HEAD", name_only=True)
-    files = [f.strip() for f in local_diff.split("\n")]
+    repo = pygit2.Repository(".")
 
-    # Diff against a particular branch (if applicable)
+    # Diff against the point where we diverged from a particular branch (if applicable)
+    # Otherwise, collect any modified files (both staged and unstaged)
+    revision = "HEAD"
     if branch:
-        branch_diff = repo.git.diff(branch, name_only=True)
-        files += [f.strip() for f in branch_diff.split("\n") if f not in files]
-
-    changed_source_files = _filter_source_files(files)
-    changed_test_files = _filter_test_files(files)
+        head = repo.head.target
+        target = repo.revparse_single(branch).peel(pygit2.Commit).id
+        # If the branch points at HEAD, there's no need to walk history for a merge base
+        if target != head:
+            base = repo.merge_base(target, head)
+            if base is None:
+                raise click.ClickException(
+                    f"HEAD and {branch} share no common history; unable to determine which files have changed"
+                )
+            revision = str(base)
+
+    # libgit2's tree-to-workdir diff bypasses the index and treats anything missing from the tree as untracked,
+    # dropping newly added files. To match `git diff <revision>`, combine tree-to-index and index-to-workdir diffs.
+    tree = repo.revparse_single(revision).peel(pygit2.Tree)
+    diffs = (tree.diff_to_index(repo.index), repo.diff())
+
+    # Deltas may repeat a path; collecting into a set dedupes in O(1) per entry
+    files: Set[str] = {delta.new_file.path for diff in diffs for delta in diff.deltas}
+    if not files:
+        return [], []
+
+    changed_source_files, changed_test_files = _classify_changed_files(files)
     return changed_source_files, changed_test_files
 
 
-def retrieve_all_source_files(source: str) -> List[str]:
+def _classify_changed_files(files: Iterable[str]) -> Tuple[List[str], List[str]]:
+    # Run the classification over the joined paths so the regex engine does the per-line work
+    # Unlike the results of our filesystem walk, git output may include files that have since been deleted
+    text = "\0".join(files)
+    source_matches = (match.group() for match in _SOURCE_FILE_RE.finditer(text))
+    test_matches = (match.group() for match in _TEST_FILE_RE.finditer(text))
+
+    source_files = [file for file in source_matches if os.path.isfile(file)]
+    test_files = [file for file in test_matches if os.path.isfile(file)]
+    return source_files, test_files
+
+
+def retrieve_all_py_files_classified(
+    source: str, tests: Optional[str], exclude_dirs: Iterable[str] = ()
+) -> Tuple[List[str], List[str]]:
+    """Utility to aggregate all source and test files in a single pass over the filesystem
+
+    Equivalent to calling both `retrieve_all_source_files` and `retrieve_all_test_files` but
+    each directory is only walked once and files are classified as they are encountered.
+
+    Args:
+        source: The relative path to your source directory
+        tests: The relative path to your tests directory (if applicable)
+        exclude_dirs: Names of directories to skip (on top of `DEFAULT_EXCLUDED_DIRS`)
+
+    Returns:
+        A tuple containing existing source files and test files from the provided directories
+
+    """
+    source_files = []
+    test_files = []
+    for path, name in _walk_py_files(source, exclude_dirs):
+        if _is_test_file(name):
+            test_files.append(path)
+        else:
+            source_files.append(path)
+
+    # Only test files are relevant from an external tests directory
+    if tests is not None:
+        for path, name in _walk_py_files(tests, exclude_dirs):
+            if _is_test_file(name):
+                test_files.append(path)
+
+    return source_files, test_files
+
+
+def retrieve_all_source_files(
+    source: str, exclude_dirs: Iterable[str] = ()
+) -> List[str]:
     """Utility to aggregate all source files for future processing
 
     Args:
         source: The relative path to your source directory
+        exclude_dirs: Names of directories to skip (on top of `DEFAULT_EXCLUDED_DIRS`)
 
     Returns:
         A list of existing Python files from your source directory
 
     """
-    all_files = _retrieve_all_py_files(source)
-    source_files = _filter_source_files(all_files)
-    return source_files
+    # Files are classified as they stream out of the walk; only the final list is materialized
+    all_files = _walk_py_files(source, exclude_dirs)
+    return [path for path, name in all_files if not _is_test_file(name)]
 
 
-def retrieve_all_test_files(source: str, tests: Optional[str]) -> List[str]:
+def retrieve_all_test_files(
+    source: str, tests: Optional[str], exclude_dirs: Iterable[str] = ()
+) -> List[str]:
     """Utility to aggregate all test files for future processing
 
     Note that the tests argument is optional because some users keep their tests
@@ -57,46 +148,62 @@ def retrieve_all_test_files(source: str, tests: Optional[str]) -> List[str]:
     Args:
         source: The relative path to your source directory
         tests: The relative path to your tests directory (if applicable)
+        exclude_dirs: Names of directories to skip (on top of `DEFAULT_EXCLUDED_DIRS`)
 
     Returns:
         A list of existing Python tests files from the provided directories
 
     """
-    all_files = _retrieve_all_py_files(source)
+    # Files are classified as they stream out of the walk; only the final list is materialized
+    all_files: Iterable[Tuple[str, str]] = _walk_py_files(source, exclude_dirs)
     if tests is not None:
-        all_files += _retrieve_all_py_files(tests)
-
-    test_files = _filter_test_files(all_files)
-    return test_files
-
-
-def _retrieve_all_py_files(directory: str) -> List[str]:
-    return [file for file in glob.glob(f"{directory}/**/*.py", recursive=True)]
-
-
-def _filter_source_files(files: List[str]) -> List[str]:
-    source_files = []
-    for file in files:
-        path = pathlib.Path(file)
-        if not _is_existing_py_file(path):
-            continue
-        stem = path.stem
-        if not (stem == "conftest" or path.stem.startswith("test_")):
-            source_files.append(str(path))
-    return sorted(source_files)
-
-
-def _filter_test_files(files: List[str]) -> List[str]:
-    test_files = []
-    for file in files:
-        path = pathlib.Path(file)
-        if not _is_existing_py_file(path):
+        all_files = itertools.chain(all_files, _walk_py_files(tests, exclude_dirs))
+
+    return [path for path, name in all_files if _is_test_file(name)]
+
+
+def _walk_py_files(
+    directory: str, exclude_dirs: Iterable[str] = ()
+) -> Iterator[Tuple[str, str]]:
+    excluded = DEFAULT_EXCLUDED_DIRS.union(exclude_dirs)
+
+    # Normalizing the root keeps yielded paths consistent with the repo-relative paths git reports
+    # (i.e. `./src//foo.py` -> `src/foo.py`)
+    root = os.path.normpath(directory)
+    if root == os.curdir:
+        root = ""
+
+    # Iterative walk using scandir; directory entries carry their file type so we avoid a stat per file
+    # Excluded directories are pruned here rather than filtered afterwards so we never descend into them
+    # Symlinked directories are followed (consistent with glob); each directory carries the identities of its
+    # ancestors so we only stop at actual cycles (a directory reachable through multiple paths is listed under each)
+    stack: List[Tuple[str, FrozenSet[Tuple[int, int]]]] = [(root, frozenset())]
+    while stack:
+        current, ancestors = stack.pop()
+        # Unreadable directories are skipped (consistent with glob)
+        try:
+            stat = os.stat(current or os.curdir)
+            key = (stat.st_dev, stat.st_ino)
+            if key in ancestors:
+                continue
+            ancestors = ancestors | {key}
+            with os.scandir(current or os.curdir) as scanner:
+                entries = list(scanner)
+        except OSError:
             continue
-        stem = path.stem
-        if stem == "conftest" or stem.startswith("test_"):
-            test_files.append(str(path))
-    return sorted(test_files)
-
 
-def _is_existing_py_file(path: pathlib.Path) -> bool:
-    return path.is_file() and path.suffix == ".py"
+        for entry in entries:
+            name = entry.name
+            # Hidden files and directories are skipped (consistent with glob)
+            if name.startswith("."):
+                continue
+            if entry.is_dir():
+                if name not in excluded:
+                    stack.append((os.path.join(current, name), ancestors))
+            # is_file() only needs a stat for symlinks (dangling links are skipped)
+            elif name.endswith(_PY_SUFFIX) and entry.is_file():
+                yield os.path.join(current, name), name
+
+
+def _is_test_file(name: str) -> bool:
+    return name == _CONFTEST or name.startswith(_TEST_PREFIX)
@@ -1,4 +1,5 @@
-from typing import Dict, List, Optional, Set
+import re
+from typing import Dict, List, Optional, Pattern, Set
 
 
 def determine_tests_to_run(
@@ -61,7 +62,7 @@ def determine_relevant_source_files(
     for file in changed_source_files:
         deps = _traverse_graph(file, source_dependency_graph, depth)
         relevant_source_files.update(deps)
-    return sorted(relevant_source_files)
+    return list(relevant_source_files)
 
 
 def _traverse_graph(root: str, graph: Dict[str, Set[str]], depth: int) -> Set[str]:
@@ -108,6 +109,8 @@ def determine_test_candidates(
         tests: Set[str] = tests_dependency_graph.get(file, set())
         for test in tests:
             candidates.add(test)
+
+    # Intermediate results are left unordered; this is the one place we sort before emitting the final output
     return sorted(candidates)
 
 
@@ -128,13 +131,23 @@ def filter_test_candidates(
         The final list of tests to be run. This is the end result of the full dgtest algorithm.
 
     """
+    # Prefixes are compiled into a single pattern so each file requires one match rather than one check per prefix
+    ignore_pattern = _compile_prefix_pattern(ignore_paths)
+    filter_pattern = _compile_prefix_pattern([filter_] if filter_ else [])
+
     filtered_tests = []
     for file in test_candidates:
         # Throw out files that are in our ignore list
-        if any(file.startswith(path) for path in ignore_paths):
+        if ignore_pattern and ignore_pattern.match(file):
             continue
         # Throw out files that aren't explicitly part of a filter (if supplied)
-        if filter_ and not file.startswith(filter_):
+        if filter_pattern and not filter_pattern.match(file):
             continue
         filtered_tests.append(file)
     return filtered_tests
+
+
+def _compile_prefix_pattern(prefixes: List[str]) -> Optional[Pattern[str]]:
+    if not prefixes:
+        return None
+    return re.compile("|".join(re.escape(prefix) for prefix in prefixes))
@@ -2,21 +2,27 @@ import ast
 import difflib
 import pathlib
 from collections import defaultdict, namedtuple
-from typing import DefaultDict, Dict, List, Optional, Set, Tuple
+from typing import DefaultDict, Dict, Iterable, List, Optional, Set, Tuple
 
-from dgtest.core.fs import retrieve_all_source_files, retrieve_all_test_files
+from dgtest.core.cache import ParseCache
+from dgtest.core.fs import retrieve_all_py_files_classified
 
 Import = namedtuple("Import", ["source", "module", "name", "alias"])
 
 
 def get_dependency_graphs(
-    source: str, tests: Optional[str]
+    source: str,
+    tests: Optional[str],
+    exclude_dirs: Iterable[str] = (),
+    cache: Optional[ParseCache] = None,
 ) -> Tuple[Dict[str, Set[str]], Dict[str, Set[str]]]:
     """Wrapper method that encapsulates all parsing behavior.
 
     Args:
         source: The relative path to your source directory
         tests: The relative path to your tests directory
+        exclude_dirs: Names of directories to skip when gathering files
+        cache: An optional store of results shared between parsing stages (see `ParseCache`)
 
     Returns:
         Two dependency graphs:
@@ -27,16 +33,17 @@ def get_dependency_graphs(
 
     """
     # Identify relevant files for later steps
-    source_files = retrieve_all_source_files(source)
-    test_files = retrieve_all_test_files(source, tests)
+    source_files, test_files = retrieve_all_py_files_classified(
+        source, tests, exclude_dirs
+    )
 
     # Parse function/class defs and fixtures
-    definition_map = parse_definition_nodes_from_codebase(source_files)
+    definition_map = parse_definition_nodes_from_codebase(source_files, cache)
     fixture_map = parse_pytest_fixtures_from_codebase(test_files, definition_map)
 
     # Use prior steps to generate relevant dependency graphs
     source_dependency_graph = parse_import_nodes_from_codebase(
-        source_files, source, definition_map
+        source_files, source, definition_map, cache
     )
     tests_dependency_graph = parse_pytest_tests_from_codebase(
         test_files, source, definition_map, fixture_map
@@ -50,11 +57,13 @@ def get_dependency_graphs(
 
 def parse_definition_nodes_from_codebase(
     source_files: List[str],
+    cache: Optional[ParseCache] = None,
 ) -> Dict[str, Set[str]]:
     """Utility to parse all class/function definitions from a given codebase
 
     Args:
         source_files: A list of files from the codebase
+        cache: An optional store of results shared between parsing stages (see `ParseCache`)
 
     Returns:
         A mapping between class/function definition and the origin of that symbol.
@@ -63,16 +72,22 @@ def parse_definition_nodes_from_codebase(
     """
     definition_map: Dict[str, Set[str]] = {}
     for file in source_files:
-        file_definition_map = parse_definition_nodes_from_file(file)
+        file_definition_map = parse_definition_nodes_from_file(file, cache)
         update_dict(definition_map, file_definition_map)
     return definition_map
 
 
-def parse_definition_nodes_from_file(file: str) -> Dict[str, Set[str]]:
+def parse_definition_nodes_from_file(
+    file: str, cache: Optional[ParseCache] = None
+) -> Dict[str, Set[str]]:
     """ See `parse_definition_nodes_from_codebase` """
     with open(file) as f:
         root = ast.parse(f.read(), file)
 
+    # Record the file's imports while we have its AST so the import stage doesn't need to parse it again
+    if cache is not None:
+        cache.imports[file] = _gather_import_nodes(root, file)
+
     definition_nodes = []
     for node in root.body:
         if isinstance(node, (ast.FunctionDef, ast.ClassDef)):
@@ -89,7 +104,10 @@ def parse_definition_nodes_from_file(file: str) -> Dict[str, Set[str]]:
 
 
 def parse_import_nodes_from_codebase(
-    source_files: List[str], source: str, definition_map: Dict[str, Set[str]]
+    source_files: List[str],
+    source: str,
+    definition_map: Dict[str, Set[str]],
+    cache: Optional[ParseCache] = None,
 ) -> Dict[str, Set[str]]:
     """Utility to parse all relative import statements from a given codebase.
 
@@ -97,6 +115,7 @@ def parse_import_nodes_from_codebase(
         source_files: A list of files from the codebase
         source: The prefix of source files
         definition_map: An association between function/class definition and its origin (see `parse_definition_nodes_from_codebase`)
+        cache: An optional store of results shared between parsing stages (see `ParseCache`)
 
     Returns:
         A mapping between a function/class and where it is used.
@@ -105,7 +124,7 @@ def parse_import_nodes_from_codebase(
     """
     imports_map: DefaultDict[str, Set[str]] = defaultdict(set)
     for file in source_files:
-        file_imports = parse_import_nodes_from_file(file, source, definition_map)
+        file_imports = parse_import_nodes_from_file(file, source, definition_map, cache)
         for import_ in file_imports:
             imports_map[import_].add(file)
     return imports_map
@@ -115,22 +134,25 @@ def parse_import_nodes_from_file(
     file: str,
     source: str,
     definition_map: Dict[str, Set[str]],
+    cache: Optional[ParseCache] = None,
 ) -> Set[str]:
     """ See `parse_import_nodes_from_codebase` """
-    imports = _gather_import_nodes_from_file(file)
-    paths = set()
-    for import_ in imports:
-        path = _generate_path_from_import_node(import_, source, definition_map)
-        if path is not None:
-            paths.add(path)
+    imports = _gather_import_nodes_from_file(file, cache)
+    return _generate_paths_from_import_nodes(imports, source, definition_map)
 
-    return paths
 
+def _gather_import_nodes_from_file(
+    file: str, cache: Optional[ParseCache] = None
+) -> List[Import]:
+    if cache is not None and file in cache.imports:
+        return cache.imports[file]
 
-def _gather_import_nodes_from_file(file: str) -> List[Import]:
     with open(file) as f:
         root = ast.parse(f.read(), file)
+    return _gather_import_nodes(root, file)
+
 
+def _gather_import_nodes(root: ast.Module, file: str) -> List[Import]:
     imports = []
     for node in root.body:
         # import great_expectations.x.y.z
@@ -149,6 +171,18 @@ def _gather_import_nodes_from_file(file: str) -> List[Import]:
     return imports
 
 
+def _generate_paths_from_import_nodes(
+    imports: List[Import], source: str, definition_map: Dict[str, Set[str]]
+) -> Set[str]:
+    paths = set()
+    for import_ in imports:
+        path = _generate_path_from_import_node(import_, source, definition_map)
+        if path is not None:
+            paths.add(path)
+
+    return paths
+
+
 def _generate_path_from_import_node(
     import_: Import, source: str, definition_map: Dict[str, Set[str]]
 ) -> Optional[str]:
@@ -297,15 +331,18 @@ def parse_pytest_tests_from_file(
     fixture_map: Dict[str, Set[str]],
 ) -> Dict[str, Set[str]]:
     """ See `parse_pytest_tests_from_codebase` """
+    with open(test_file) as f:
+        root = ast.parse(f.read(), test_file)
+
     # Parse the test file's imports and create associations between source files and test files
     file_graph: DefaultDict[str, Set[str]] = defaultdict(set)
-    source_file_paths = parse_import_nodes_from_file(test_file, source, definition_map)
+    imports = _gather_import_nodes(root, test_file)
+    source_file_paths = _generate_paths_from_import_nodes(
+        imports, source, definition_map
+    )
     for source_file in source_file_paths:
         file_graph[source_file].add(test_file)
 
-    with open(test_file) as f:
-        root = ast.parse(f.read(), test_file)
-
     # For each test function declaration in the test file, check the args to see if they are fixtures
     # If they are, add the fixture's dependencies
     for node in root.body:
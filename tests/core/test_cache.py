@@ -0,0 +1,38 @@
+import py
+
+from dgtest.core.cache import ParseCache
+from dgtest.core.parse import (
+    parse_definition_nodes_from_file,
+    parse_import_nodes_from_file,
+)
+
+
+def test_parse_cache_records_imports_during_definition_stage(
+    tmpdir: py.path.local,
+) -> None:
+    my_file = tmpdir.join("foo.py")
+    my_file.write("import os\nfrom my_package.bar import baz\n\ndef foo():\n    pass\n")
+    cache = ParseCache()
+
+    parse_definition_nodes_from_file(my_file.strpath, cache)
+
+    imports = cache.imports[my_file.strpath]
+    assert len(imports) == 2
+    assert imports[1].module == ["my_package", "bar"]
+    assert imports[1].name == ["baz"]
+
+
+def test_parse_cache_is_used_by_import_stage(tmpdir: py.path.local) -> None:
+    my_file = tmpdir.join("foo.py")
+    my_file.write("from my_package.bar import baz\n")
+    cache = ParseCache()
+    definition_map = {"baz": {"my_package/bar.py"}}
+
+    parse_definition_nodes_from_file(my_file.strpath, cache)
+
+    # The import stage should rely on the cache rather than re-reading the file
+    my_file.remove()
+    paths = parse_import_nodes_from_file(
+        my_file.strpath, "my_package", definition_map, cache
+    )
+    assert paths == {"my_package/bar.py"}
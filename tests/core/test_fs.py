@@ -1,11 +1,15 @@
-from typing import Callable, List, Tuple
+import os
+from typing import Any, Callable, List, Tuple
 from unittest import mock
 
+import click
 import py
+import pygit2
 import pytest
 
 from dgtest.core.fs import (
     get_changed_files,
+    retrieve_all_py_files_classified,
     retrieve_all_source_files,
     retrieve_all_test_files,
 )
@@ -25,10 +29,31 @@ def create_mock_files(tmpdir: py.path.local) -> Callable:
     return _create_mock_files
 
 
+@pytest.fixture(scope="function")
+def git_repo(tmpdir: py.path.local, monkeypatch: Any) -> pygit2.Repository:
+    """Initializes a real git repo in a temporary directory and makes it the working directory"""
+    monkeypatch.chdir(tmpdir)
+    return pygit2.init_repository(tmpdir.strpath)
+
+
+def _commit(repo: pygit2.Repository, message: str) -> pygit2.Oid:
+    repo.index.add_all()
+    repo.index.write()
+    tree = repo.index.write_tree()
+    parents = [] if repo.head_is_unborn else [repo.head.target]
+    signature = pygit2.Signature("dgtest", "dgtest@example.com")
+    return repo.create_commit("HEAD", signature, signature, message, tree, parents)
+
+
+def _mock_diff(*files: str) -> mock.Mock:
+    deltas = [mock.Mock(**{"new_file.path": file}) for file in files]
+    return mock.Mock(deltas=deltas)
+
+
 def test_get_changed_files_only_source_files(create_mock_files: Callable) -> None:
     _, files = create_mock_files("my_dir", "foo.py", "bar.py", "baz.py")
-    with mock.patch("dgtest.core.fs.git.Repo") as mock_repo:
-        mock_repo().git.diff.return_value = "\n".join(file for file in files)
+    with mock.patch("dgtest.core.fs.pygit2.Repository") as mock_repo:
+        mock_repo().diff.return_value = _mock_diff(*files)
         changed_source_files, changed_test_files = get_changed_files("origin/master")
 
     assert len(changed_source_files) == 3
@@ -48,22 +73,137 @@ def test_get_changed_files_both_source_and_test_files(
         "test_baz.py",
         "conftest.py",
     )
-    with mock.patch("dgtest.core.fs.git.Repo") as mock_repo:
-        mock_repo().git.diff.return_value = "\n".join(file for file in files)
+    with mock.patch("dgtest.core.fs.pygit2.Repository") as mock_repo:
+        mock_repo().diff.return_value = _mock_diff(*files)
         changed_source_files, changed_test_files = get_changed_files("origin/master")
 
     assert len(changed_source_files) == 3
     assert len(changed_test_files) == 4
 
 
+def test_get_changed_files_diffs_against_merge_base(
+    create_mock_files: Callable,
+) -> None:
+    _, files = create_mock_files("my_dir", "foo.py", "test_foo.py")
+    with mock.patch("dgtest.core.fs.pygit2.Repository") as mock_repo:
+        mock_repo().merge_base.return_value = "abc123"
+        mock_repo().diff.return_value = _mock_diff(*files)
+        changed_source_files, changed_test_files = get_changed_files("origin/master")
+
+    mock_repo().revparse_single.assert_called_with("abc123")
+    assert changed_source_files == [files[0]]
+    assert changed_test_files == [files[1]]
+
+
+def test_get_changed_files_without_branch_diffs_against_head(
+    create_mock_files: Callable,
+) -> None:
+    _, files = create_mock_files("my_dir", "foo.py", "test_foo.py")
+    with mock.patch("dgtest.core.fs.pygit2.Repository") as mock_repo:
+        mock_repo().diff.return_value = _mock_diff(*files)
+        get_changed_files(None)
+
+    mock_repo().merge_base.assert_not_called()
+    mock_repo().revparse_single.assert_called_once_with("HEAD")
+
+
+def test_get_changed_files_skips_merge_base_when_branch_is_head(
+    create_mock_files: Callable,
+) -> None:
+    _, files = create_mock_files("my_dir", "foo.py", "test_foo.py")
+    with mock.patch("dgtest.core.fs.pygit2.Repository") as mock_repo:
+        repo = mock_repo()
+        repo.revparse_single().peel().id = repo.head.target
+        repo.diff.return_value = _mock_diff(*files)
+        get_changed_files("origin/master")
+
+    repo.merge_base.assert_not_called()
+    repo.revparse_single.assert_called_with("HEAD")
+
+
+def test_get_changed_files_with_empty_diff() -> None:
+    with mock.patch("dgtest.core.fs.pygit2.Repository") as mock_repo:
+        mock_repo().diff.return_value = _mock_diff()
+        changed_source_files, changed_test_files = get_changed_files("origin/master")
+
+    assert changed_source_files == []
+    assert changed_test_files == []
+
+
+def test_get_changed_files_deduplicates_files(create_mock_files: Callable) -> None:
+    _, files = create_mock_files("my_dir", "foo.py", "test_foo.py")
+    with mock.patch("dgtest.core.fs.pygit2.Repository") as mock_repo:
+        mock_repo().diff.return_value = _mock_diff(*files, *files)
+        changed_source_files, changed_test_files = get_changed_files("origin/master")
+
+    assert changed_source_files == [files[0]]
+    assert changed_test_files == [files[1]]
+
+
+def test_get_changed_files_handles_newlines_in_file_names(
+    create_mock_files: Callable,
+) -> None:
+    _, files = create_mock_files("my_dir", "foo.py\ntest_foo.py", "test_bar.py")
+    with mock.patch("dgtest.core.fs.pygit2.Repository") as mock_repo:
+        mock_repo().diff.return_value = _mock_diff(*files)
+        changed_source_files, changed_test_files = get_changed_files("origin/master")
+
+    assert changed_source_files == [files[0]]
+    assert changed_test_files == [files[1]]
+
+
+def test_get_changed_files_includes_staged_and_committed_files(
+    git_repo: pygit2.Repository, tmpdir: py.path.local
+) -> None:
+    src = tmpdir.mkdir("src")
+    src.join("a.py").write("")
+    base = _commit(git_repo, "Initial commit")
+    git_repo.branches.local.create("main", git_repo[base].peel(pygit2.Commit))
+
+    # Committed on the current branch but not on main
+    src.join("b.py").write("")
+    _commit(git_repo, "Add b")
+
+    # Unstaged modification and staged addition
+    src.join("a.py").write("a = 1\n")
+    src.join("test_c.py").write("")
+    git_repo.index.add("src/test_c.py")
+    git_repo.index.write()
+
+    changed_source_files, changed_test_files = get_changed_files(None)
+    assert changed_source_files == ["src/a.py"]
+    assert changed_test_files == ["src/test_c.py"]
+
+    changed_source_files, changed_test_files = get_changed_files("main")
+    assert sorted(changed_source_files) == ["src/a.py", "src/b.py"]
+    assert changed_test_files == ["src/test_c.py"]
+
+
+def test_get_changed_files_without_merge_base_raises(
+    git_repo: pygit2.Repository, tmpdir: py.path.local
+) -> None:
+    tmpdir.join("a.py").write("")
+    _commit(git_repo, "Initial commit")
+
+    # Create an orphaned branch that shares no history with HEAD
+    signature = pygit2.Signature("dgtest", "dgtest@example.com")
+    tree = git_repo.TreeBuilder().write()
+    git_repo.create_commit(
+        "refs/heads/orphan", signature, signature, "Orphan", tree, []
+    )
+
+    with pytest.raises(click.ClickException):
+        get_changed_files("orphan")
+
+
 def test_get_changed_files_excludes_non_py_files(
     create_mock_files: Callable,
 ) -> None:
     _, files = create_mock_files(
         "my_dir", "foo.yml", "bar.json", "README.md", "LICENSE"
     )
-    with mock.patch("dgtest.core.fs.git.Repo") as mock_repo:
-        mock_repo().git.diff.return_value = "\n".join(file for file in files)
+    with mock.patch("dgtest.core.fs.pygit2.Repository") as mock_repo:
+        mock_repo().diff.return_value = _mock_diff(*files)
         changed_source_files, changed_test_files = get_changed_files("origin/master")
 
     assert len(changed_source_files) == 0
@@ -74,8 +214,8 @@ def test_get_changed_files_excludes_nonexistant_files(tmpdir: py.path.local) ->
     my_dir = tmpdir.mkdir("my_dir")
     fake_file = my_dir.join("fake_file.py")
 
-    with mock.patch("dgtest.core.fs.git.Repo") as mock_repo:
-        mock_repo().git.diff.return_value = fake_file.strpath
+    with mock.patch("dgtest.core.fs.pygit2.Repository") as mock_repo:
+        mock_repo().diff.return_value = _mock_diff(fake_file.strpath)
         changed_source_files, changed_test_files = get_changed_files("origin/master")
 
     assert len(changed_source_files) == 0
@@ -90,6 +230,96 @@ def test_retrieve_all_source_files(create_mock_files: Callable) -> None:
     assert len(source_files) == 2
 
 
+def test_retrieve_all_source_files_walks_nested_directories(
+    tmpdir: py.path.local,
+) -> None:
+    my_dir = tmpdir.mkdir("my_dir")
+    my_dir.join("foo.py").write("")
+    my_dir.mkdir("nested").mkdir("deeper").join("bar.py").write("")
+    my_dir.mkdir(".hidden").join("baz.py").write("")
+    my_dir.join("README.md").write("")
+
+    source_files = retrieve_all_source_files(my_dir.strpath)
+    assert sorted(source_files) == [
+        os.path.join(my_dir.strpath, "foo.py"),
+        os.path.join(my_dir.strpath, "nested", "deeper", "bar.py"),
+    ]
+
+
+def test_retrieve_all_source_files_follows_symlinked_directories(
+    tmpdir: py.path.local,
+) -> None:
+    my_dir = tmpdir.mkdir("my_dir")
+    my_dir.join("foo.py").write("")
+    tmpdir.mkdir("elsewhere").join("bar.py").write("")
+    my_dir.join("linked").mksymlinkto(tmpdir.join("elsewhere"))
+    my_dir.join("cycle").mksymlinkto(my_dir)
+
+    source_files = retrieve_all_source_files(my_dir.strpath)
+    assert sorted(source_files) == [
+        os.path.join(my_dir.strpath, "foo.py"),
+        os.path.join(my_dir.strpath, "linked", "bar.py"),
+    ]
+
+
+def test_retrieve_all_source_files_lists_symlinked_directories_under_each_path(
+    tmpdir: py.path.local,
+) -> None:
+    my_dir = tmpdir.mkdir("my_dir")
+    my_dir.mkdir("real").join("foo.py").write("")
+    my_dir.join("zz").mksymlinkto(my_dir.join("real"))
+
+    source_files = retrieve_all_source_files(my_dir.strpath)
+    assert sorted(source_files) == [
+        os.path.join(my_dir.strpath, "real", "foo.py"),
+        os.path.join(my_dir.strpath, "zz", "foo.py"),
+    ]
+
+
+def test_retrieve_all_source_files_skips_unreadable_directories(
+    tmpdir: py.path.local,
+) -> None:
+    my_dir = tmpdir.mkdir("my_dir")
+    my_dir.join("foo.py").write("")
+    locked = my_dir.mkdir("locked")
+    locked.join("bar.py").write("")
+
+    scandir = os.scandir
+
+    def _scandir(path: str) -> Any:
+        if path == locked.strpath:
+            raise PermissionError(path)
+        return scandir(path)
+
+    with mock.patch("dgtest.core.fs.os.scandir", side_effect=_scandir):
+        source_files = retrieve_all_source_files(my_dir.strpath)
+
+    assert source_files == [os.path.join(my_dir.strpath, "foo.py")]
+
+
+def test_retrieve_all_source_files_skips_dangling_symlinks(
+    tmpdir: py.path.local,
+) -> None:
+    my_dir = tmpdir.mkdir("my_dir")
+    my_dir.join("foo.py").write("")
+    my_dir.join("bar.py").mksymlinkto(tmpdir.join("nonexistent.py"))
+
+    source_files = retrieve_all_source_files(my_dir.strpath)
+    assert source_files == [os.path.join(my_dir.strpath, "foo.py")]
+
+
+def test_retrieve_all_source_files_skips_excluded_directories(
+    tmpdir: py.path.local,
+) -> None:
+    my_dir = tmpdir.mkdir("my_dir")
+    my_dir.join("foo.py").write("")
+    my_dir.mkdir("__pycache__").join("bar.py").write("")
+    my_dir.mkdir("build").join("baz.py").write("")
+
+    source_files = retrieve_all_source_files(my_dir.strpath, exclude_dirs=["build"])
+    assert source_files == [os.path.join(my_dir.strpath, "foo.py")]
+
+
 def test_retrieve_all_test_files_without_test_arg(
     create_mock_files: Callable,
 ) -> None:
@@ -108,3 +338,20 @@ def test_retrieve_all_test_files_with_test_arg(create_mock_files: Callable) -> N
     my_test_dir, _ = create_mock_files("tests", "test_baz.py", "test_qux.py")
     test_files = retrieve_all_test_files(my_source_dir, my_test_dir)
     assert len(test_files) == 4
+
+
+def test_retrieve_all_py_files_classified(create_mock_files: Callable) -> None:
+    my_source_dir, _ = create_mock_files(
+        "my_dir", "foo.py", "bar.py", "test_foo.py", "conftest.py"
+    )
+    my_test_dir, _ = create_mock_files("tests", "test_baz.py", "helpers.py")
+    source_files, test_files = retrieve_all_py_files_classified(
+        my_source_dir, my_test_dir
+    )
+
+    assert sorted(source_files) == sorted(retrieve_all_source_files(my_source_dir))
+    assert sorted(test_files) == sorted(
+        retrieve_all_test_files(my_source_dir, my_test_dir)
+    )
+    assert len(source_files) == 2
+    assert len(test_files) == 3
@@ -89,3 +89,16 @@ def test_filter_test_candidates_with_ignore_paths_and_filter() -> None:
 
     tests = filter_test_candidates(candidates, ignore_paths, filter_="a/b/c")
     assert tests == ["a/b/c"]
+
+
+def test_filter_test_candidates_treats_prefixes_literally() -> None:
+    candidates = [
+        "a.b/c",
+        "axb/c",
+        "a[1]/d",
+        "a1/d",
+    ]
+    ignore_paths = ["a.b", "a[1]"]
+
+    tests = filter_test_candidates(candidates, ignore_paths, filter_=None)
+    assert tests == ["axb/c", "a1/d"]